@@ -9,12 +9,11 @@ from datetime import datetime, timezone, timedelta
 
 import plotly.graph_objects as go
 import streamlit as st
-from bson import ObjectId
 from streamlit_star_rating import st_star_rating
 
 from utils.app_style import inject_custom_styles
 from utils.auth_helper import auth_required
-from utils.mongo_helper import get_collection
+from utils.mongo_helper import get_collection, invalidate_user_stats, as_object_id
 
 # Constants
 DB_NAME = "fitlistic"
@@ -41,13 +40,14 @@ def get_user_streak(user_id):
 
     streak = 0
     now = datetime.now(timezone.utc)
+    user_obj_id = as_object_id(user_id)
 
     # Check if user worked out today
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
 
     today_workout = collection.find_one({
-        "user_id": ObjectId(user_id),
+        "user_id": user_obj_id,
         "date": {"$gte": today_start, "$lt": today_end}
     })
 
@@ -57,7 +57,7 @@ def get_user_streak(user_id):
         yesterday_end = yesterday_start + timedelta(days=1)
 
         yesterday_workout = collection.find_one({
-            "user_id": ObjectId(user_id),
+            "user_id": user_obj_id,
             "date": {"$gte": yesterday_start, "$lt": yesterday_end}
         })
 
@@ -74,7 +74,7 @@ def get_user_streak(user_id):
         check_date_prev = check_date - timedelta(days=1)
 
         prev_workout = collection.find_one({
-            "user_id": ObjectId(user_id),
+            "user_id": user_obj_id,
             "date": {"$gte": check_date_prev, "$lt": check_date}
         })
 
@@ -101,7 +101,7 @@ def display_wellbeing_progress(user_id):
     try:
         # Fetch all well-being entries for this user, sorted by date ascending
         collection = get_collection(DB_NAME, WELLBEING_COLLECTION)
-        wellbeing_docs = list(collection.find({"user_id": ObjectId(user_id)}).sort("date", 1))
+        wellbeing_docs = list(collection.find({"user_id": as_object_id(user_id)}).sort("date", 1))
     except Exception as e:
         st.error(f"Error fetching well-being scores: {e}")
         wellbeing_docs = []
@@ -176,13 +176,14 @@ def display_test_entries_button(user_id):
             ) - timedelta(days=offset)
 
             doc = {
-                "user_id": ObjectId(user_id),
+                "user_id": as_object_id(user_id),
                 "date": date_entry,
                 "score": score,
                 "notes": note
             }
             collection.insert_one(doc)
 
+        invalidate_user_stats(user_id)
         st.success("5 test well-being entries added! Reloading...")
         st.rerun()
 
@@ -211,7 +212,7 @@ def display_mood_logger(user_id):
 
     # Query for an entry in the current day
     found = collection.find_one({
-        "user_id": ObjectId(user_id),
+        "user_id": as_object_id(user_id),
         "date": {
             "$gte": today_start,
             "$lt": tomorrow_start
@@ -235,12 +236,13 @@ def display_mood_logger(user_id):
             if st.button("Submit Mood"):
                 try:
                     mood_doc = {
-                        "user_id": ObjectId(user_id),
+                        "user_id": as_object_id(user_id),
                         "date": datetime.now(timezone.utc),
                         "score": mood_rating,
                         "notes": mood_notes
                     }
                     collection.insert_one(mood_doc)
+                    invalidate_user_stats(user_id)
                     st.success("Your mood has been logged successfully!")
                 except Exception as e:
                     st.error(f"Error logging mood: {e}")
@@ -259,22 +261,23 @@ def get_workout_logs_by_period(user_id):
     try:
         workout_collection = get_collection(DB_NAME, WORKOUT_LOGS_COLLECTION)
         now = datetime.now(timezone.utc)
+        user_obj_id = as_object_id(user_id)
         seven_days_ago = now - timedelta(days=DAYS_IN_WEEK)
         thirty_days_ago = now - timedelta(days=DAYS_IN_MONTH)
 
         # Get all workout logs for various time periods
         week_logs = list(workout_collection.find({
-            "user_id": ObjectId(user_id),
+            "user_id": user_obj_id,
             "date": {"$gte": seven_days_ago}
         }))
 
         month_logs = list(workout_collection.find({
-            "user_id": ObjectId(user_id),
+            "user_id": user_obj_id,
             "date": {"$gte": thirty_days_ago}
         }))
 
         all_logs = list(workout_collection.find({
-            "user_id": ObjectId(user_id)
+            "user_id": user_obj_id
         }))
 
         return {
@@ -10,7 +10,7 @@ from datetime import datetime, timezone, timedelta
 import streamlit as st
 from utils.app_style import inject_custom_styles
 from utils.auth_helper import auth_required
-from utils.mongo_helper import get_collection, get_active_workout_plan, save_workout_log, estimate_calories_burned
+from utils.mongo_helper import get_collection, get_active_workout_plan, save_workout_log, estimate_total_calories
 from bson.objectid import ObjectId
 
 # Constants
@@ -406,7 +406,8 @@ def display_completion_section(user_id, current_date, current_workout, active_pl
                 current_workout.get('schedule', []),
                 current_workout.get('type', 'Daily'),
                 workout_notes,
-                plan_id  # Pass plan_id to save_workout_log
+                plan_id,  # Pass plan_id to save_workout_log
+                st.session_state.user.get('weight')
             )
 
             if success:
@@ -480,12 +481,11 @@ def display_workout_details(workout, user_id):
     total_duration = sum(block.get('duration', 0) for block in workout_items)
     user_weight = st.session_state.user.get('weight', 70)
 
-    # Estimate calories for each activity type
-    total_calories = 0
-    for block in workout_items:
-        activity_type = block.get('activity', {}).get('type', 'unknown')
-        duration = block.get('duration', 0)
-        total_calories += estimate_calories_burned(activity_type, duration, user_weight)
+    # Estimate calories across all activity types
+    total_calories = estimate_total_calories(
+        [(block.get('activity', {}).get('type', 'unknown'), block.get('duration', 0)) for block in workout_items],
+        user_weight
+    )
 
     # Display summary metrics
     col1, col2 = st.columns(2)
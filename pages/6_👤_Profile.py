@@ -120,12 +120,12 @@ def verify_and_update_password(
             return False
 
         # Hash new password
-        hashed_pw, salt = hash_password(new_password)
+        hashed_pw = hash_password(new_password)
 
-        # Update password
+        # Update password; bcrypt embeds the salt, so drop any legacy copy
         result = collection.update_one(
             {"_id": user_id},
-            {"$set": {"password": hashed_pw, "salt": salt}}
+            {"$set": {"password": hashed_pw}, "$unset": {"salt": ""}}
         )
 
         return result.modified_count > 0
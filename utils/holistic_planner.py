@@ -8,8 +8,13 @@ daily and weekly schedules.
 """
 
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Any, Sequence
+
+from cachetools import TTLCache
 
 # Constants for workout configuration
 WORKOUT_DURATIONS = [15, 30, 45, 60]
@@ -24,11 +29,129 @@ DEFAULT_EXERCISE_COUNTS = {15: 2, 30: 2, 45: 4, 60: 4}
 # Define difficulty levels
 DIFFICULTY_LEVELS = ['beginner', 'intermediate', 'advanced']
 
+# Preferred fallback order of difficulty levels for each requested level
+LEVEL_FALLBACK_LADDER = {
+    'advanced': ('advanced', 'intermediate', 'beginner'),
+    'intermediate': ('intermediate', 'beginner', 'advanced'),
+    'beginner': ('beginner', 'intermediate', 'advanced')
+}
+
+# Lookup sets for user data validation
+VALID_DIFFICULTY_LEVELS = frozenset(DIFFICULTY_LEVELS)
+VALID_WORKOUT_DURATIONS = frozenset(WORKOUT_DURATIONS)
+REQUIRED_USER_FIELDS = frozenset({
+    'weight', 'height', 'fitness_goals', 'experience_level',
+    'preferred_rest_day', 'workout_duration', 'start_date', 'date_range'
+})
+
 # Collection types
 COLLECTION_TYPES = ['exercises', 'warm_ups', 'cool_downs', 'stretching', 'meditation', 'breathwork']
 
-# Global cache to avoid re-fetching data
-template_cache = {}
+# Tags identifying the training split an exercise belongs to
+CORE_SPLIT_TAGS = frozenset({'push', 'pull', 'legs', 'core'})
+MAX_PRIORITIZED_EXERCISES = 5
+
+# Mappings from fitness goals to relevant tags for each collection
+GOAL_TAG_MAPPING = {
+    "exercises": {
+        "Muscle Gain": ("push", "upper-body", "compound", "strength"),
+        "Weight Loss": ("hiit", "full-body", "cardio"),
+        "General Fitness": ("functional", "bodyweight", "compound", "general"),
+        "Flexibility": ("bodyweight", "functional", "mobility"),
+        "Better Mental Health": ("bodyweight", "functional"),
+        "Stress Resilience": ("functional", "bodyweight"),
+    },
+    "breathwork": {
+        "General Fitness": ("hiit", "recovery", "foam-rolling", "stretching"),
+        "Weight Loss": ("hiit", "recovery", "foam-rolling", "stretching"),
+        "Better Mental Health": ("recovery", "foam-rolling"),
+        "Flexibility": ("recovery", "stretching"),
+        "Stress Resilience": ("recovery", "relaxation"),
+        "Muscle Gain": ("recovery", "power"),
+    },
+    "meditation": {
+        "Better Mental Health": ("mindfulness", "relaxation", "anxiety-reduction", "awareness"),
+        "Stress Resilience": ("relaxation", "anxiety-reduction", "awareness"),
+        "General Fitness": ("mindfulness", "relaxation"),
+        "Flexibility": ("mindfulness", "body-awareness"),
+        "Weight Loss": ("focus", "discipline"),
+        "Muscle Gain": ("focus", "visualization"),
+    },
+    "stretching": {
+        "Flexibility": ("morning", "mobility", "wake-up", "energizing"),
+        "General Fitness": ("mobility", "functional"),
+        "Weight Loss": ("full-body", "active"),
+        "Better Mental Health": ("relaxation", "mindful"),
+        "Stress Resilience": ("relaxation", "recovery"),
+        "Muscle Gain": ("recovery", "muscle-specific"),
+    },
+    "cool_downs": {
+        "General Fitness": ("general", "basic", "relaxation", "recovery"),
+        "Weight Loss": ("general", "basic", "relaxation", "recovery"),
+        "Flexibility": ("stretching", "mobility"),
+        "Better Mental Health": ("relaxation", "mindful"),
+        "Stress Resilience": ("relaxation", "recovery"),
+        "Muscle Gain": ("recovery", "gentle"),
+    },
+    "warm_ups": {
+        "General Fitness": ("general", "foundational", "no-equipment", "scalable"),
+        "Muscle Gain": ("strength", "activation", "mobility", "preparation"),
+        "Weight Loss": ("cardio", "full-body", "hiit"),
+        "Flexibility": ("mobility", "dynamic"),
+        "Better Mental Health": ("energizing", "focus"),
+        "Stress Resilience": ("grounding", "energizing"),
+    }
+}
+
+# Default tags for each collection as a fallback
+DEFAULT_TAGS = {
+    "exercises": ("functional", "bodyweight", "compound", "general"),
+    "breathwork": ("recovery", "relaxation"),
+    "meditation": ("mindfulness", "relaxation"),
+    "stretching": ("general", "full-body"),
+    "cool_downs": ("general", "basic"),
+    "warm_ups": ("general", "foundational")
+}
+
+# Day type rotations, keyed by the goal that selects them
+DAY_TYPE_ROTATIONS = {
+    'Muscle Gain': ('Push', 'Pull', 'Legs', 'Upper Body', 'Lower Body'),
+    'default': ('Full Body', 'Cardio', 'Strength', 'HIIT', 'Endurance')
+}
+
+# Order in which components appear in a daily schedule
+SCHEDULE_COMPONENTS = ('warm_up', 'breathwork', 'main_exercises', 'stretching', 'cool_down', 'meditation')
+
+# Maximum number of documents pulled per fetch
+EXERCISE_POOL_LIMIT = 20
+ROUTINE_POOL_LIMIT = 3
+EXERCISES_PER_DAY = 5
+
+# Fields read from each collection when building schedule components
+FETCH_PROJECTIONS = {
+    'exercises': {'name': 1, 'tags': 1, 'difficulty_levels': 1, 'form_cues': 1, 'target_muscles': 1},
+    'warm_ups': {'name': 1, 'phases': 1, 'instructions': 1, 'benefits': 1, 'target_areas': 1,
+                 'equipment_needed': 1, 'target_heart_rate': 1},
+    'cool_downs': {'name': 1, 'phases': 1, 'instructions': 1, 'benefits': 1, 'target_areas': 1,
+                   'equipment_needed': 1, 'target_heart_rate': 1},
+    'breathwork': {'name': 1, 'steps': 1, 'instructions': 1, 'benefits': 1},
+    'stretching': {'name': 1, 'sequence': 1, 'instructions': 1, 'benefits': 1, 'target_areas': 1},
+    'meditation': {'name': 1, 'steps': 1, 'benefits': 1}
+}
+
+# Shared immutable default for missing list fields
+EMPTY_FIELD = ()
+
+# Cache limits for fetched templates
+TEMPLATE_CACHE_SIZE = 512
+TEMPLATE_CACHE_TTL_SECONDS = 3600
+
+# Global cache to avoid re-fetching data (bounded and expiring, since keys include the day)
+template_cache = TTLCache(maxsize=TEMPLATE_CACHE_SIZE, ttl=TEMPLATE_CACHE_TTL_SECONDS)
+template_cache_lock = threading.Lock()
+
+# Shared pool for running a day's independent collection fetches concurrently
+fetch_executor = ThreadPoolExecutor(max_workers=len(COLLECTION_TYPES), thread_name_prefix="plan-fetch")
 
 
 def validate_user_data(user_data: Dict) -> None:
@@ -41,24 +164,19 @@ def validate_user_data(user_data: Dict) -> None:
     Raises:
         ValueError: If required fields are missing or invalid
     """
-    required_fields = [
-        'weight', 'height', 'fitness_goals', 'experience_level',
-        'preferred_rest_day', 'workout_duration', 'start_date', 'date_range'
-    ]
-
     # Check for missing fields
-    missing_fields = [field for field in required_fields if field not in user_data]
+    missing_fields = REQUIRED_USER_FIELDS - user_data.keys()
     if missing_fields:
-        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+        raise ValueError(f"Missing required fields: {', '.join(sorted(missing_fields))}")
 
     # Validate field types and values
     if not isinstance(user_data['fitness_goals'], list):
         raise ValueError("fitness_goals must be a list")
 
-    if user_data['experience_level'] not in DIFFICULTY_LEVELS:
+    if user_data['experience_level'] not in VALID_DIFFICULTY_LEVELS:
         raise ValueError(f"experience_level must be one of: {', '.join(DIFFICULTY_LEVELS)}")
 
-    if user_data['workout_duration'] not in WORKOUT_DURATIONS:
+    if user_data['workout_duration'] not in VALID_WORKOUT_DURATIONS:
         raise ValueError(f"workout_duration must be one of: {WORKOUT_DURATIONS}")
 
     # Validate date_range
@@ -151,10 +269,10 @@ def prepare_warmup_component(warmups: List[Dict], seed_base: int, warmup_time: i
         'activity': {
             '_id': warmup.get('_id'),
             'name': warmup.get('name', 'Warm-Up'),
-            'phases': warmup.get('phases', []),
-            'instructions': warmup.get('instructions', []),
-            'benefits': warmup.get('benefits', []),
-            'target_areas': warmup.get('target_areas', []),
+            'phases': warmup.get('phases', EMPTY_FIELD),
+            'instructions': warmup.get('instructions', EMPTY_FIELD),
+            'benefits': warmup.get('benefits', EMPTY_FIELD),
+            'target_areas': warmup.get('target_areas', EMPTY_FIELD),
             'type': 'warm_up',
             'equipment_needed': warmup.get('equipment_needed', 'None'),
             'target_heart_rate': warmup.get('target_heart_rate', '')
@@ -183,9 +301,9 @@ def prepare_breathwork_component(breathwork_list: List[Dict], seed_base: int, br
         'activity': {
             '_id': breath.get('_id'),
             'name': breath.get('name', 'Breathwork'),
-            'steps': breath.get('steps', []),
-            'instructions': breath.get('instructions', []),
-            'benefits': breath.get('benefits', []),
+            'steps': breath.get('steps', EMPTY_FIELD),
+            'instructions': breath.get('instructions', EMPTY_FIELD),
+            'benefits': breath.get('benefits', EMPTY_FIELD),
             'type': 'breathwork'
         },
         'duration': breathwork_time
@@ -212,29 +330,27 @@ def prepare_exercise_components(
     """
     result = []
     exercise_count = min(len(exercises), max_count)
+    level_ladder = LEVEL_FALLBACK_LADDER.get(difficulty_level, (difficulty_level,))
 
     for ex in exercises[:exercise_count]:
-        # If the specific difficulty level isn't available, try to fall back
-        effective_level = difficulty_level
-        if effective_level not in ex.get('difficulty_levels', {}):
-            if 'intermediate' in ex.get('difficulty_levels', {}) and effective_level == 'advanced':
-                effective_level = 'intermediate'
-            elif 'beginner' in ex.get('difficulty_levels', {}):
-                effective_level = 'beginner'
-            else:
-                effective_level = next(iter(ex.get('difficulty_levels', {}).keys()), None)
+        difficulty_levels = ex.get('difficulty_levels') or {}
+
+        # Use the first available level on the ladder, skipping exercises with none of them
+        effective_level = next((level for level in level_ladder if level in difficulty_levels), None)
 
         if effective_level:
+            level_data = difficulty_levels[effective_level]
+            name = ex.get('name', 'Unnamed Exercise')
             result.append({
                 'activity': {
                     '_id': ex.get('_id'),
-                    'name': ex.get('name', 'Unnamed Exercise'),
+                    'name': name,
                     'exercises': [{
-                        'name': ex.get('name', 'Unnamed Exercise'),
-                        'form_cues': ex.get('form_cues', []),
-                        'sets': ex['difficulty_levels'][effective_level].get('sets', 'N/A'),
-                        'reps': ex['difficulty_levels'][effective_level].get('reps', 'N/A'),
-                        'target_muscles': ex.get('target_muscles', [])
+                        'name': name,
+                        'form_cues': ex.get('form_cues', EMPTY_FIELD),
+                        'sets': level_data.get('sets', 'N/A'),
+                        'reps': level_data.get('reps', 'N/A'),
+                        'target_muscles': ex.get('target_muscles', EMPTY_FIELD)
                     }],
                     'type': 'exercise'
                 },
@@ -264,10 +380,10 @@ def prepare_stretching_component(stretching_list: List[Dict], seed_base: int, st
         'activity': {
             '_id': stretch.get('_id'),
             'name': stretch.get('name', 'Stretching'),
-            'sequence': stretch.get('sequence', []),
-            'instructions': stretch.get('instructions', []),
-            'benefits': stretch.get('benefits', []),
-            'target_areas': stretch.get('target_areas', []),
+            'sequence': stretch.get('sequence', EMPTY_FIELD),
+            'instructions': stretch.get('instructions', EMPTY_FIELD),
+            'benefits': stretch.get('benefits', EMPTY_FIELD),
+            'target_areas': stretch.get('target_areas', EMPTY_FIELD),
             'type': 'stretching'
         },
         'duration': stretching_time
@@ -294,10 +410,10 @@ def prepare_cooldown_component(cooldowns: List[Dict], seed_base: int, cooldown_t
         'activity': {
             '_id': cooldown.get('_id'),
             'name': cooldown.get('name', 'Cool-Down'),
-            'phases': cooldown.get('phases', []),
-            'instructions': cooldown.get('instructions', []),
-            'benefits': cooldown.get('benefits', []),
-            'target_areas': cooldown.get('target_areas', []),
+            'phases': cooldown.get('phases', EMPTY_FIELD),
+            'instructions': cooldown.get('instructions', EMPTY_FIELD),
+            'benefits': cooldown.get('benefits', EMPTY_FIELD),
+            'target_areas': cooldown.get('target_areas', EMPTY_FIELD),
             'type': 'cool_down',
             'equipment_needed': cooldown.get('equipment_needed', 'None'),
             'target_heart_rate': cooldown.get('target_heart_rate', '')
@@ -326,15 +442,45 @@ def prepare_meditation_component(meditations: List[Dict], seed_base: int, medita
         'activity': {
             '_id': meditation.get('_id'),
             'name': meditation.get('name', 'Meditation'),
-            'steps': meditation.get('steps', []),
-            'benefits': meditation.get('benefits', []),
+            'steps': meditation.get('steps', EMPTY_FIELD),
+            'benefits': meditation.get('benefits', EMPTY_FIELD),
             'type': 'meditation'
         },
         'duration': meditation_time
     }
 
 
-def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, day_date: str) -> List[Dict]:
+def fetch_day_templates(user_data: Dict, collections: Dict, day_date: str,
+                        durations: Dict[str, int]) -> Dict[str, Sequence[Dict]]:
+    """
+    Fetch every collection needed for a day's schedule in parallel.
+
+    Args:
+        user_data: Dictionary with user preferences
+        collections: Dictionary of MongoDB collections
+        day_date: Date string for cache key and randomization
+        durations: Component durations from get_component_durations
+
+    Returns:
+        Dictionary mapping schedule components to fetched documents
+    """
+    level = user_data['experience_level']
+    futures = {
+        'warm_up': fetch_executor.submit(fetch_warm_ups, user_data, collections, day_date),
+        'main_exercises': fetch_executor.submit(fetch_exercises, user_data, collections, day_date),
+        'cool_down': fetch_executor.submit(fetch_cool_downs, user_data, collections, day_date),
+        'meditation': fetch_executor.submit(fetch_meditations, level, collections, day_date)
+    }
+    if durations['include_breathwork']:
+        futures['breathwork'] = fetch_executor.submit(fetch_breathwork, level, collections, day_date)
+    if durations['include_stretching']:
+        futures['stretching'] = fetch_executor.submit(fetch_stretching, user_data, collections, day_date)
+
+    return {component: future.result() for component, future in futures.items()}
+
+
+def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, day_date: str,
+                        durations: Optional[Dict[str, int]] = None) -> List[Dict]:
     """
     Create a daily schedule by combining items from multiple collections.
 
@@ -343,6 +489,7 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
         collections: Dictionary of MongoDB collections
         is_rest_day: Boolean indicating if this is a rest day
         day_date: Date string for the schedule
+        durations: Optional precomputed component durations for the workout time
 
     Returns:
         List of activities for the day's schedule
@@ -352,23 +499,21 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
 
     # Get workout duration parameters
     total_workout_time = user_data.get('workout_duration', DEFAULT_WORKOUT_DURATION)
-    durations = get_component_durations(total_workout_time)
+    if durations is None:
+        durations = get_component_durations(total_workout_time)
 
     # Create schedule template to fill in proper order
-    schedule_template = {
-        'warm_up': None,
-        'breathwork': None,
-        'main_exercises': [],
-        'stretching': None,
-        'cool_down': None,
-        'meditation': None
-    }
+    schedule_template = dict.fromkeys(SCHEDULE_COMPONENTS)
+    schedule_template['main_exercises'] = []
 
     # Use day_date as seed for selections
     day_seed_base = sum(ord(c) for c in day_date)
 
-    # 1. Fetch and prepare Warm-Up
-    warmups = fetch_warm_ups(user_data, collections, day_date)
+    # Issue all of the day's collection fetches at once instead of one round trip at a time
+    fetched = fetch_day_templates(user_data, collections, day_date, durations)
+
+    # 1. Prepare Warm-Up
+    warmups = fetched['warm_up']
     if warmups:
         schedule_template['warm_up'] = prepare_warmup_component(
             warmups,
@@ -376,9 +521,9 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
             durations['warmup_time']
         )
 
-    # 2. Fetch and prepare Breathwork
+    # 2. Prepare Breathwork
     if durations['include_breathwork']:
-        breathwork = fetch_breathwork(user_data['experience_level'], collections, day_date)
+        breathwork = fetched['breathwork']
         if breathwork:
             schedule_template['breathwork'] = prepare_breathwork_component(
                 breathwork,
@@ -386,8 +531,8 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
                 durations['breathwork_time']
             )
 
-    # 3. Fetch and prepare Main Exercises
-    main_exercises = fetch_exercises(user_data, collections, day_date)
+    # 3. Prepare Main Exercises
+    main_exercises = fetched['main_exercises']
 
     # Calculate remaining time for main exercises after other components
     auxiliary_time = (
@@ -410,9 +555,9 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
             exercise_count
         )
 
-    # 4. Fetch and prepare Stretching
+    # 4. Prepare Stretching
     if durations['include_stretching']:
-        stretching = fetch_stretching(user_data, collections, day_date)
+        stretching = fetched['stretching']
         if stretching:
             schedule_template['stretching'] = prepare_stretching_component(
                 stretching,
@@ -420,8 +565,8 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
                 durations['stretching_time']
             )
 
-    # 5. Fetch and prepare Cool-down
-    cooldowns = fetch_cool_downs(user_data, collections, day_date)
+    # 5. Prepare Cool-down
+    cooldowns = fetched['cool_down']
     if cooldowns:
         schedule_template['cool_down'] = prepare_cooldown_component(
             cooldowns,
@@ -429,8 +574,8 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
             durations['cooldown_time']
         )
 
-    # 6. Fetch and prepare Meditation
-    meditations = fetch_meditations(user_data['experience_level'], collections, day_date)
+    # 6. Prepare Meditation
+    meditations = fetched['meditation']
     if meditations:
         schedule_template['meditation'] = prepare_meditation_component(
             meditations,
@@ -441,19 +586,11 @@ def create_day_schedule(user_data: Dict, collections: Dict, is_rest_day: bool, d
     # Build final schedule in correct order
     daily_schedule = []
 
-    if schedule_template['warm_up']:
-        daily_schedule.append(schedule_template['warm_up'])
-    if schedule_template['breathwork']:
-        daily_schedule.append(schedule_template['breathwork'])
-
-    daily_schedule.extend(schedule_template['main_exercises'])
-
-    if schedule_template['stretching']:
-        daily_schedule.append(schedule_template['stretching'])
-    if schedule_template['cool_down']:
-        daily_schedule.append(schedule_template['cool_down'])
-    if schedule_template['meditation']:
-        daily_schedule.append(schedule_template['meditation'])
+    for component in SCHEDULE_COMPONENTS:
+        if component == 'main_exercises':
+            daily_schedule.extend(schedule_template[component])
+        elif schedule_template[component]:
+            daily_schedule.append(schedule_template[component])
 
     return daily_schedule
 
@@ -475,15 +612,23 @@ def create_weekly_schedule(user_data: dict, collections: dict) -> dict:
     # Get preferred rest day from user data
     preferred_rest_day = user_data.get('preferred_rest_day')
 
+    # Component durations are the same for every workout day
+    durations = get_component_durations(user_data.get('workout_duration', DEFAULT_WORKOUT_DURATION))
+
     for date in date_range:
-        is_rest_day = date == preferred_rest_day
+        # Rest days have no activities, so skip building a schedule for them
+        if date == preferred_rest_day:
+            schedule[date] = {'type': 'Rest Day', 'schedule': []}
+            continue
+
         schedule[date] = {
-            'type': 'Rest Day' if is_rest_day else 'Workout Day',
+            'type': 'Workout Day',
             'schedule': create_day_schedule(
                 user_data,
                 collections,
-                is_rest_day,
-                date
+                False,
+                date,
+                durations
             )
         }
 
@@ -501,11 +646,7 @@ def get_day_type(day_index: int, goals: List[str]) -> str:
     Returns:
         String indicating the day type
     """
-    if 'Muscle Gain' in goals:
-        types = ['Push', 'Pull', 'Legs', 'Upper Body', 'Lower Body']
-    else:
-        types = ['Full Body', 'Cardio', 'Strength', 'HIIT', 'Endurance']
-
+    types = DAY_TYPE_ROTATIONS['Muscle Gain' if 'Muscle Gain' in goals else 'default']
     return types[day_index % len(types)]
 
 
@@ -564,92 +705,76 @@ def map_goals_to_valid_tags(goals: list) -> dict:
                             "General Fitness", "Weight Loss", "Muscle Gain"]
 
     Returns:
-        Dictionary mapping collections to lists of relevant tags
-    """
-    # Define the mappings from goals to tags for each collection
-    mapping = {
-        "exercises": {
-            "Muscle Gain": ["push", "upper-body", "compound", "strength"],
-            "Weight Loss": ["hiit", "full-body", "cardio"],
-            "General Fitness": ["functional", "bodyweight", "compound", "general"],
-            "Flexibility": ["bodyweight", "functional", "mobility"],
-            "Better Mental Health": ["bodyweight", "functional"],
-            "Stress Resilience": ["functional", "bodyweight"],
-        },
-        "breathwork": {
-            "General Fitness": ["hiit", "recovery", "foam-rolling", "stretching"],
-            "Weight Loss": ["hiit", "recovery", "foam-rolling", "stretching"],
-            "Better Mental Health": ["recovery", "foam-rolling"],
-            "Flexibility": ["recovery", "stretching"],
-            "Stress Resilience": ["recovery", "relaxation"],
-            "Muscle Gain": ["recovery", "power"],
-        },
-        "meditation": {
-            "Better Mental Health": ["mindfulness", "relaxation", "anxiety-reduction", "awareness"],
-            "Stress Resilience": ["relaxation", "anxiety-reduction", "awareness"],
-            "General Fitness": ["mindfulness", "relaxation"],
-            "Flexibility": ["mindfulness", "body-awareness"],
-            "Weight Loss": ["focus", "discipline"],
-            "Muscle Gain": ["focus", "visualization"],
-        },
-        "stretching": {
-            "Flexibility": ["morning", "mobility", "wake-up", "energizing"],
-            "General Fitness": ["mobility", "functional"],
-            "Weight Loss": ["full-body", "active"],
-            "Better Mental Health": ["relaxation", "mindful"],
-            "Stress Resilience": ["relaxation", "recovery"],
-            "Muscle Gain": ["recovery", "muscle-specific"],
-        },
-        "cool_downs": {
-            "General Fitness": ["general", "basic", "relaxation", "recovery"],
-            "Weight Loss": ["general", "basic", "relaxation", "recovery"],
-            "Flexibility": ["stretching", "mobility"],
-            "Better Mental Health": ["relaxation", "mindful"],
-            "Stress Resilience": ["relaxation", "recovery"],
-            "Muscle Gain": ["recovery", "gentle"],
-        },
-        "warm_ups": {
-            "General Fitness": ["general", "foundational", "no-equipment", "scalable"],
-            "Muscle Gain": ["strength", "activation", "mobility", "preparation"],
-            "Weight Loss": ["cardio", "full-body", "hiit"],
-            "Flexibility": ["mobility", "dynamic"],
-            "Better Mental Health": ["energizing", "focus"],
-            "Stress Resilience": ["grounding", "energizing"],
-        }
-    }
+        Dictionary mapping collections to tuples of relevant tags (shared, do not modify)
+    """
+    return map_goal_set_to_tags(frozenset(goals))
 
-    # Define default tags for each collection as a fallback
-    DEFAULT_TAGS = {
-        "exercises": ["functional", "bodyweight", "compound", "general"],
-        "breathwork": ["recovery", "relaxation"],
-        "meditation": ["mindfulness", "relaxation"],
-        "stretching": ["general", "full-body"],
-        "cool_downs": ["general", "basic"],
-        "warm_ups": ["general", "foundational"]
-    }
 
+@lru_cache(maxsize=64)
+def map_goal_set_to_tags(goals: frozenset) -> dict:
+    """
+    Build the collection-to-tags mapping for a set of goals, memoized per goal set.
+
+    Args:
+        goals: Frozenset of fitness goals
+
+    Returns:
+        Dictionary mapping collections to tuples of relevant tags
+    """
     # Build the result dictionary
     result = {}
-    for collection, goal_map in mapping.items():
-        tags = []
+    for collection, goal_map in GOAL_TAG_MAPPING.items():
+        default_tags = DEFAULT_TAGS.get(collection, ())
+        tags = set()
         for goal in goals:
-            if goal in goal_map:
-                tags.extend(goal_map[goal])
-            else:
-                # Add default tags if no mapping for this goal
-                tags.extend(DEFAULT_TAGS.get(collection, []))
+            # Add default tags if no mapping for this goal
+            tags.update(goal_map.get(goal, default_tags))
 
         # If empty, use defaults
-        if not tags and collection in DEFAULT_TAGS:
-            tags = DEFAULT_TAGS[collection]
+        if not tags:
+            tags.update(default_tags)
 
-        result[collection] = list(set(tags)) if tags else []
+        result[collection] = tuple(tags)
 
     return result
 
 
+def get_cached_templates(cache_key: Tuple) -> Optional[Tuple[Dict, ...]]:
+    """
+    Look up previously fetched documents in the template cache.
+
+    Args:
+        cache_key: Hashable key identifying the fetch
+
+    Returns:
+        Cached documents or None on a cache miss
+    """
+    with template_cache_lock:
+        return template_cache.get(cache_key)
+
+
+def cache_templates(cache_key: Tuple, documents: List[Dict]) -> Tuple[Dict, ...]:
+    """
+    Store fetched documents in the template cache.
+
+    Documents are stored as a tuple so callers sharing a cache entry
+    cannot reorder or truncate it.
+
+    Args:
+        cache_key: Hashable key identifying the fetch
+        documents: Documents returned by the fetch
+
+    Returns:
+        The stored documents as a tuple
+    """
+    frozen = tuple(documents)
+    with template_cache_lock:
+        template_cache[cache_key] = frozen
+    return frozen
+
+
 # Shared helper function for fetch operations
-def execute_query_with_fallbacks(collection, queries, limit=5):
+def execute_query_with_fallbacks(collection, queries, limit=5, projection=None):
     """
     Execute a series of MongoDB queries, falling back to the next if no results.
 
@@ -657,17 +782,19 @@ def execute_query_with_fallbacks(collection, queries, limit=5):
         collection: MongoDB collection to query
         queries: List of queries to try in order
         limit: Maximum number of results to return
+        projection: Optional projection limiting the returned fields
 
     Returns:
         List of documents matching the first successful query
     """
+    # Cap results on the server and receive them in a single batch
     for query in queries:
-        results = list(collection.find(query).limit(limit))
+        results = list(collection.find(query, projection, limit=limit, batch_size=limit))
         if results:
             return results
 
     # Last resort - get any documents
-    return list(collection.find().limit(limit))
+    return list(collection.find({}, projection, limit=limit, batch_size=limit))
 
 
 def fetch_exercises(user_data: dict, collections: dict, day_date: str = None) -> list:
@@ -683,7 +810,7 @@ def fetch_exercises(user_data: dict, collections: dict, day_date: str = None) ->
         List of exercise documents
     """
     mapping = map_goals_to_valid_tags(user_data['fitness_goals'])
-    valid_tags = mapping.get("exercises", [])
+    valid_tags = mapping.get("exercises", ())
     level = user_data['experience_level']
 
     # Build queries with fallbacks
@@ -706,7 +833,9 @@ def fetch_exercises(user_data: dict, collections: dict, day_date: str = None) ->
     # Remove None queries
     queries = [q for q in queries if q is not None]
 
-    exercises = execute_query_with_fallbacks(collections['exercises'], queries)
+    exercises = execute_query_with_fallbacks(
+        collections['exercises'], queries, EXERCISE_POOL_LIMIT, FETCH_PROJECTIONS['exercises']
+    )
 
     if not exercises:
         return []
@@ -717,7 +846,7 @@ def fetch_exercises(user_data: dict, collections: dict, day_date: str = None) ->
         random.seed(f"{day_date}_{user_data['experience_level']}")
 
     # Return random selection of exercises
-    random_selection = random.sample(exercises, min(5, len(exercises)))
+    random_selection = random.sample(exercises, min(EXERCISES_PER_DAY, len(exercises)))
 
     # Reset random seed
     random.seed()
@@ -725,7 +854,7 @@ def fetch_exercises(user_data: dict, collections: dict, day_date: str = None) ->
     return random_selection
 
 
-def fetch_breathwork(level: str, collections: Dict, day_date: str = None) -> List[Dict]:
+def fetch_breathwork(level: str, collections: Dict, day_date: str = None) -> Tuple[Dict, ...]:
     """
     Fetch breathwork techniques based on difficulty level.
 
@@ -735,13 +864,14 @@ def fetch_breathwork(level: str, collections: Dict, day_date: str = None) -> Lis
         day_date: Date string for cache key and randomization
 
     Returns:
-        List of breathwork documents
+        Tuple of breathwork documents
     """
     # Include day in cache key for variety across days
-    cache_key = f"breathwork_{level}_{day_date}" if day_date else f"breathwork_{level}"
+    cache_key = ('breathwork', level, day_date)
 
-    if cache_key in template_cache:
-        return template_cache[cache_key]
+    cached = get_cached_templates(cache_key)
+    if cached is not None:
+        return cached
 
     # Build queries with fallbacks
     queries = [
@@ -763,13 +893,14 @@ def fetch_breathwork(level: str, collections: Dict, day_date: str = None) -> Lis
     # Remove None queries
     queries = [q for q in queries if q is not None]
 
-    techniques = execute_query_with_fallbacks(collections['breathwork'], queries, 3)
+    techniques = execute_query_with_fallbacks(
+        collections['breathwork'], queries, ROUTINE_POOL_LIMIT, FETCH_PROJECTIONS['breathwork']
+    )
 
-    template_cache[cache_key] = techniques
-    return techniques
+    return cache_templates(cache_key, techniques)
 
 
-def fetch_meditations(level: str, collections: Dict, day_date: str = None) -> List[Dict]:
+def fetch_meditations(level: str, collections: Dict, day_date: str = None) -> Tuple[Dict, ...]:
     """
     Fetch meditation templates based on difficulty level.
 
@@ -779,13 +910,14 @@ def fetch_meditations(level: str, collections: Dict, day_date: str = None) -> Li
         day_date: Date string for cache key and randomization
 
     Returns:
-        List of meditation documents
+        Tuple of meditation documents
     """
     # Include day in cache key for variety across days
-    cache_key = f"meditation_{level}_{day_date}" if day_date else f"meditation_{level}"
+    cache_key = ('meditation', level, day_date)
 
-    if cache_key in template_cache:
-        return template_cache[cache_key]
+    cached = get_cached_templates(cache_key)
+    if cached is not None:
+        return cached
 
     # Build queries with fallbacks
     queries = [
@@ -807,13 +939,14 @@ def fetch_meditations(level: str, collections: Dict, day_date: str = None) -> Li
     # Remove None queries
     queries = [q for q in queries if q is not None]
 
-    meditations = execute_query_with_fallbacks(collections['meditation'], queries, 3)
+    meditations = execute_query_with_fallbacks(
+        collections['meditation'], queries, ROUTINE_POOL_LIMIT, FETCH_PROJECTIONS['meditation']
+    )
 
-    template_cache[cache_key] = meditations
-    return meditations
+    return cache_templates(cache_key, meditations)
 
 
-def fetch_stretching(user_data: Dict, collections: Dict, day_date: str = None) -> List[Dict]:
+def fetch_stretching(user_data: Dict, collections: Dict, day_date: str = None) -> Tuple[Dict, ...]:
     """
     Fetch stretching routines based on user data.
 
@@ -823,19 +956,20 @@ def fetch_stretching(user_data: Dict, collections: Dict, day_date: str = None) -
         day_date: Date string for cache key and randomization
 
     Returns:
-        List of stretching documents
+        Tuple of stretching documents
     """
     level = user_data['experience_level']
 
     # Include day in cache key for variety across days
-    cache_key = (f"stretching_{level}_{'-'.join(sorted(user_data['fitness_goals']))}_{day_date}"
-                 if day_date else f"stretching_{level}_{'-'.join(sorted(user_data['fitness_goals']))}")
+    goal_set = frozenset(user_data['fitness_goals'])
+    cache_key = ('stretching', level, goal_set, day_date)
 
-    if cache_key in template_cache:
-        return template_cache[cache_key]
+    cached = get_cached_templates(cache_key)
+    if cached is not None:
+        return cached
 
     # Get tags from goals
-    tags = map_goals_to_valid_tags(user_data['fitness_goals']).get("stretching", [])
+    tags = map_goal_set_to_tags(goal_set).get("stretching", ())
 
     # Build queries with fallbacks
     queries = [
@@ -857,15 +991,16 @@ def fetch_stretching(user_data: Dict, collections: Dict, day_date: str = None) -
     # Remove None queries
     queries = [q for q in queries if q is not None]
 
-    routines = execute_query_with_fallbacks(collections['stretching'], queries, 3)
+    routines = execute_query_with_fallbacks(
+        collections['stretching'], queries, ROUTINE_POOL_LIMIT, FETCH_PROJECTIONS['stretching']
+    )
 
-    template_cache[cache_key] = routines
-    return routines
+    return cache_templates(cache_key, routines)
 
 
 def fetch_routine_by_level_and_tags(collection_name: str, user_data: Dict,
                                     collections: Dict, day_date: str = None,
-                                    limit: int = 3) -> List[Dict]:
+                                    limit: int = ROUTINE_POOL_LIMIT) -> Tuple[Dict, ...]:
     """
     Generic function to fetch routines from collections based on user level and tags.
 
@@ -877,20 +1012,20 @@ def fetch_routine_by_level_and_tags(collection_name: str, user_data: Dict,
         limit: Maximum number of items to return
 
     Returns:
-        List of matching documents from the specified collection
+        Tuple of matching documents from the specified collection
     """
     level = user_data['experience_level']
 
     # Include day in cache key for variety across days
-    sorted_goals = '-'.join(sorted(user_data.get('fitness_goals', [])))
-    cache_key = (f"{collection_name}_{level}_{sorted_goals}_{day_date}"
-                 if day_date else f"{collection_name}_{level}_{sorted_goals}")
+    goal_set = frozenset(user_data.get('fitness_goals', ()))
+    cache_key = (collection_name, level, goal_set, day_date)
 
-    if cache_key in template_cache:
-        return template_cache[cache_key]
+    cached = get_cached_templates(cache_key)
+    if cached is not None:
+        return cached
 
     # Get tags from goals
-    tags = map_goals_to_valid_tags(user_data.get('fitness_goals', [])).get(collection_name, [])
+    tags = map_goal_set_to_tags(goal_set).get(collection_name, ())
 
     # Build queries with fallbacks
     queries = [
@@ -915,13 +1050,14 @@ def fetch_routine_by_level_and_tags(collection_name: str, user_data: Dict,
     # Remove None queries
     queries = [q for q in queries if q is not None]
 
-    results = execute_query_with_fallbacks(collections[collection_name], queries, limit)
+    results = execute_query_with_fallbacks(
+        collections[collection_name], queries, limit, FETCH_PROJECTIONS.get(collection_name)
+    )
 
-    template_cache[cache_key] = results
-    return results
+    return cache_templates(cache_key, results)
 
 
-def fetch_warm_ups(user_data: Dict, collections: Dict, day_date: str = None) -> List[Dict]:
+def fetch_warm_ups(user_data: Dict, collections: Dict, day_date: str = None) -> Tuple[Dict, ...]:
     """
     Fetch warm-up routines based on user data.
 
@@ -931,12 +1067,12 @@ def fetch_warm_ups(user_data: Dict, collections: Dict, day_date: str = None) ->
         day_date: Date string for cache key and randomization
 
     Returns:
-        List of warm-up documents
+        Tuple of warm-up documents
     """
     return fetch_routine_by_level_and_tags('warm_ups', user_data, collections, day_date)
 
 
-def fetch_cool_downs(user_data: Dict, collections: Dict, day_date: str = None) -> List[Dict]:
+def fetch_cool_downs(user_data: Dict, collections: Dict, day_date: str = None) -> Tuple[Dict, ...]:
     """
     Fetch cool-down routines based on user data.
 
@@ -946,7 +1082,7 @@ def fetch_cool_downs(user_data: Dict, collections: Dict, day_date: str = None) -
         day_date: Date string for cache key and randomization
 
     Returns:
-        List of cool-down documents
+        Tuple of cool-down documents
     """
     return fetch_routine_by_level_and_tags('cool_downs', user_data, collections, day_date)
 
@@ -965,11 +1101,20 @@ def prioritize_exercises(exercises: List[Dict], goals: List[str]) -> List[Dict]:
     selected = []
     exercise_types = set()
 
-    for ex in sorted(exercises, key=lambda _: random.random()):
-        ex_type = next((tag for tag in ex['tags'] if tag in ['push', 'pull', 'legs', 'core']), None)
-        if len(selected) < 5 and (not ex_type or ex_type not in exercise_types):
+    # Draw exercises in random order (partial Fisher-Yates), only as many as needed
+    pool = list(exercises)
+    remaining = len(pool)
+
+    while remaining and len(selected) < MAX_PRIORITIZED_EXERCISES:
+        pick = random.randrange(remaining)
+        ex = pool[pick]
+        remaining -= 1
+        pool[pick] = pool[remaining]
+
+        ex_type = next((tag for tag in ex['tags'] if tag in CORE_SPLIT_TAGS), None)
+        if not ex_type or ex_type not in exercise_types:
             selected.append(ex)
             if ex_type:
                 exercise_types.add(ex_type)
 
-    return selected[:5]
+    return selected
@@ -6,10 +6,24 @@ for the Fitlistic application. It handles user authentication, workout plans,
 logs, and fitness data collections.
 """
 
-from typing import Tuple, Optional, Mapping, Any, List, Dict, Union
-from datetime import datetime, timezone, timedelta
+from typing import Tuple, Optional, Mapping, Any, List, Dict, FrozenSet, Union, Iterator
+from datetime import date, datetime, timezone, timedelta
+from functools import lru_cache
+import atexit
 import json
-
+import threading
+import traceback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    # stdlib json also accepts bytes, so callers can read seed files in binary mode
+    json_loads = json.loads
+
+from cachetools import TTLCache
+from pymongo import ASCENDING, DESCENDING, WriteConcern, UpdateMany, InsertOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson.errors import InvalidId
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 import streamlit as st
@@ -48,14 +62,153 @@ MET_VALUES = {
     "unknown": 3.0  # Default value
 }
 
+# Workout log fields needed for history and stats views, so summary reads skip
+# the per-exercise detail. _id is kept so callers can page with a (date, _id) cursor
+WORKOUT_LOG_SUMMARY_FIELDS = {
+    "date": 1,
+    "total_duration_minutes": 1,
+    "total_calories_burned": 1
+}
+WORKOUT_LOG_BATCH_SIZE = 100
+WORKOUT_LOG_INSERT_CHUNK_SIZE = 1000
+
+# Weight used for calorie estimates when the user has none on record
+DEFAULT_WEIGHT_KG = 70
+
 # Days of the week
 DAYS_OF_WEEK = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
 
+# bcrypt work factor for new hashes, overridable with the "bcrypt_rounds" secret
+DEFAULT_BCRYPT_ROUNDS = 12
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
 
-@st.cache_resource
-def init_connection() -> Optional[MongoClient]:
+
+def get_bcrypt_rounds() -> int:
+    """
+    Get the bcrypt work factor from the app secrets, falling back to the default.
+
+    Returns:
+        Number of bcrypt rounds (log2 of iterations)
+    """
+    try:
+        rounds = int(st.secrets.get("bcrypt_rounds", DEFAULT_BCRYPT_ROUNDS))
+    except Exception:
+        return DEFAULT_BCRYPT_ROUNDS
+
+    # bcrypt.gensalt rejects anything outside this range
+    if not MIN_BCRYPT_ROUNDS <= rounds <= MAX_BCRYPT_ROUNDS:
+        print(f"❌ Ignoring bcrypt_rounds={rounds}, expected {MIN_BCRYPT_ROUNDS}-{MAX_BCRYPT_ROUNDS}")
+        return DEFAULT_BCRYPT_ROUNDS
+    return rounds
+
+
+BCRYPT_ROUNDS = get_bcrypt_rounds()
+
+
+@lru_cache(maxsize=1)
+def get_dummy_password_hash() -> bytes:
     """
-    Initialize MongoDB connection using cached resource.
+    Get the hash checked against when a username does not exist.
+
+    It is built on the first failed lookup with the configured work factor, so
+    unknown usernames take as long to reject as known ones and importing the
+    module does not pay for a bcrypt hash.
+
+    Returns:
+        bcrypt hash of a fixed dummy password
+    """
+    return bcrypt.hashpw(b"fitlistic-dummy-password", bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+
+# Seed data can be reloaded, so it only needs the primary's acknowledgement
+SEED_WRITE_CONCERN = WriteConcern(w=1)
+
+# Workout logs and completions are append-only history, so saves skip waiting on replication
+ACTIVITY_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Fields the app never reads back from a user document
+USER_EXCLUDED_FIELDS = {"salt": 0, "workout_history": 0}
+
+# Connection pool and wire settings for the shared client
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 5,
+    "maxIdleTimeMS": 60000,
+    "compressors": "zlib",
+    "retryReads": True,
+    "retryWrites": True,
+    "serverSelectionTimeoutMS": 3000,
+    "socketTimeoutMS": 10000,
+    "appname": "fitlistic"
+}
+
+# Process-wide client and resolved collection handles, created on first use
+mongo_client: Optional[MongoClient] = None
+mongo_client_lock = threading.Lock()
+collection_handles: Dict[Tuple[str, str], Any] = {}
+
+# Recently read user weights, so repeated workout saves skip the user lookup
+user_weight_cache = TTLCache(maxsize=1024, ttl=300)
+user_weight_cache_lock = threading.Lock()
+
+# Short-lived caches for dashboard stats, cleared when the user logs new data
+CACHE_MISS = object()
+wellbeing_score_cache = TTLCache(maxsize=1024, ttl=60)
+weekly_stats_cache = TTLCache(maxsize=1024, ttl=300)
+user_stats_cache_lock = threading.Lock()
+
+# Days completed this week per (user, week start), cleared when a workout is marked complete
+completed_days_cache = TTLCache(maxsize=1024, ttl=60)
+completed_days_cache_lock = threading.Lock()
+
+# Seeding only needs to succeed once per process
+fitness_collections_initialized = False
+fitness_collections_lock = threading.Lock()
+
+# Indexes backing the hot query shapes, as (keys, options) pairs per collection
+INDEX_SPECS = {
+    COLLECTIONS["USERS"]: [
+        ([("username", ASCENDING)], {"unique": True}),
+        ([("email", ASCENDING)], {"unique": True, "sparse": True})
+    ],
+    COLLECTIONS["WORKOUT_PLANS"]: [
+        # Only active plans are looked up by user, so archived plans stay out of the index
+        ([("user_id", ASCENDING)], {
+            "name": "user_id_active",
+            "partialFilterExpression": {"is_active": True}
+        })
+    ],
+    COLLECTIONS["COMPLETED_WORKOUTS"]: [
+        ([("user_id", ASCENDING), ("week_start_date", ASCENDING), ("day_of_week", ASCENDING)],
+         {"unique": True})
+    ],
+    COLLECTIONS["EXERCISES"]: [
+        ([("tags", ASCENDING), (f"difficulty_levels.{level}", ASCENDING)], {})
+        for level in ('beginner', 'intermediate', 'advanced')
+    ],
+    COLLECTIONS["BREATHWORK"]: [
+        ([("difficulty", ASCENDING), ("recommended_use.pre_workout", ASCENDING)], {})
+    ],
+    COLLECTIONS["MEDITATION"]: [
+        ([("difficulty", ASCENDING), ("duration_minutes.short", ASCENDING)], {})
+    ],
+    COLLECTIONS["STRETCHING"]: [
+        ([("difficulty", ASCENDING), ("tags", ASCENDING)], {})
+    ],
+    COLLECTIONS["WORKOUT_LOGS"]: [
+        ([("user_id", ASCENDING), ("date", DESCENDING)], {})
+    ],
+    COLLECTIONS["WELLBEING_SCORES"]: [
+        # score is included so the latest-score lookup is answered from the index
+        ([("user_id", ASCENDING), ("date", DESCENDING), ("score", ASCENDING)], {})
+    ]
+}
+
+
+def create_client() -> Optional[MongoClient]:
+    """
+    Create and verify a new MongoDB client from the app secrets.
 
     Returns:
         MongoClient or None: MongoDB client instance if connection successful, None otherwise
@@ -65,23 +218,37 @@ def init_connection() -> Optional[MongoClient]:
         username = st.secrets['username']
         password = st.secrets['password']
 
-        # Simple connection string
-        uri = (
-            "mongodb+srv://"
-            f"{username}:{password}@"
-            "cluster0.wbd1o.mongodb.net/"
-            "?retryWrites=true&w=majority"
-        )
+        # An explicit seed list skips the SRV/TXT DNS lookups on cold start
+        mongo_hosts = st.secrets.get('mongo_hosts')
+        replica_set = st.secrets.get('replica_set')
+        if mongo_hosts and replica_set:
+            uri = (
+                "mongodb://"
+                f"{username}:{password}@"
+                f"{mongo_hosts}/"
+                f"?replicaSet={replica_set}&tls=true&authSource=admin"
+                "&retryWrites=true&w=majority"
+            )
+        else:
+            uri = (
+                "mongodb+srv://"
+                f"{username}:{password}@"
+                "cluster0.wbd1o.mongodb.net/"
+                "?retryWrites=true&w=majority"
+            )
 
-        # Create client with minimal configuration
+        # Create client with explicit pool sizing and wire compression
         client = MongoClient(
             uri,
-            server_api=ServerApi('1')
+            server_api=ServerApi('1'),
+            **MONGO_CLIENT_OPTIONS
         )
 
         # Test connection
         client.admin.command('ping')
         print("✅ Connected to MongoDB")
+
+        ensure_indexes(client)
         return client
 
     except Exception as e:
@@ -90,6 +257,46 @@ def init_connection() -> Optional[MongoClient]:
         return None
 
 
+def init_connection() -> Optional[MongoClient]:
+    """
+    Get the shared MongoDB client, connecting on first use.
+
+    A failed connection is not cached, so the next call retries.
+
+    Returns:
+        MongoClient or None: MongoDB client instance if connection successful, None otherwise
+    """
+    global mongo_client
+
+    client = mongo_client
+    if client is not None:
+        return client
+
+    with mongo_client_lock:
+        if mongo_client is None:
+            mongo_client = create_client()
+            if mongo_client is not None:
+                # Close pooled connections cleanly when the process exits
+                atexit.register(mongo_client.close)
+        return mongo_client
+
+
+def ensure_indexes(client: MongoClient) -> None:
+    """
+    Create the indexes used by the application's queries if they are missing.
+
+    Args:
+        client: Connected MongoDB client
+    """
+    db = client[DB_NAME]
+    for coll_name, specs in INDEX_SPECS.items():
+        for keys, options in specs:
+            try:
+                db[coll_name].create_index(keys, **options)
+            except Exception as e:
+                print(f"❌ Could not create index on {coll_name}: {str(e)}")
+
+
 def get_collection(database_name: str, collection_name: str) -> Optional[Any]:
     """
     Get a MongoDB collection object.
@@ -101,13 +308,18 @@ def get_collection(database_name: str, collection_name: str) -> Optional[Any]:
     Returns:
         Collection object or None if connection failed
     """
+    key = (database_name, collection_name)
+    collection = collection_handles.get(key)
+    if collection is not None:
+        return collection
+
     client = init_connection()
     if client is None:
         return None
-    return client[database_name][collection_name]
+    return collection_handles.setdefault(key, client[database_name][collection_name])
 
 
-def hash_password(password: str) -> Tuple[bytes, bytes]:
+def hash_password(password: str) -> bytes:
     """
     Hash a password using bcrypt.
 
@@ -115,11 +327,9 @@ def hash_password(password: str) -> Tuple[bytes, bytes]:
         password: Plain text password
 
     Returns:
-        Tuple of (hashed_password, salt)
+        Hashed password, with the salt embedded
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed, salt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
 
 
 def verify_password(password: str, hashed_password: bytes) -> bool:
@@ -153,42 +363,51 @@ def create_user(username: str, password: str, user_data: Optional[Dict] = None)
         return False, "Database connection failed"
 
     try:
-        # Check if username exists
-        existing_user = collection.find_one({"username": username.lower()})
+        username = username.lower()
+        email = user_data['email'].lower() if user_data and 'email' in user_data else None
+
+        # Check username and email in one query; the unique indexes may be missing
+        # if ensure_indexes could not build them
+        existing_clauses = [{"username": username}]
+        if email is not None:
+            existing_clauses.append({"email": email})
+        existing_user = collection.find_one({"$or": existing_clauses}, {"username": 1, "_id": 0})
         if existing_user is not None:
-            return False, "Username already exists. Please choose another one"
-
-        # Check if email exists
-        if user_data and 'email' in user_data:
-            existing_email = collection.find_one({"email": user_data['email'].lower()})
-            if existing_email is not None:
-                return False, "Email already registered"
+            if existing_user.get("username") == username:
+                return False, "Username already exists. Please choose another one"
+            return False, "Email already registered"
 
         # Hash password
-        hashed_pw, salt = hash_password(password)
+        hashed_pw = hash_password(password)
 
         # Prepare user document
+        now_utc = datetime.now(timezone.utc)
         user_document = {
-            "username": username.lower(),
+            "username": username,
             "password": hashed_pw,
-            "salt": salt,
-            "created_at": datetime.now(timezone.utc),
-            "last_login": datetime.now(timezone.utc),
+            "created_at": now_utc,
+            "last_login": now_utc,
             "total_workouts": 0,
             "workout_history": []
         }
 
         if user_data:
-            if 'email' in user_data:
-                user_data['email'] = user_data['email'].lower()
+            if email is not None:
+                user_data['email'] = email
             user_document.update(user_data)
 
-        # Insert user
+        # Insert user; the unique indexes reject a duplicate that raced the check above
         result = collection.insert_one(user_document)
         if result.inserted_id:
             return True, "User created successfully"
         return False, "Failed to create user"
 
+    except DuplicateKeyError as e:
+        key_pattern = (e.details or {}).get("keyPattern", {})
+        if "email" in key_pattern:
+            return False, "Email already registered"
+        return False, "Username already exists. Please choose another one"
+
     except Exception as e:
         return False, str(e)
 
@@ -209,12 +428,17 @@ def validate_login(username: str, password: str) -> Tuple[bool, Optional[Mapping
         return False, None
 
     try:
-        user = collection.find_one({"username": username.lower()})
-        if user is not None and verify_password(password, user["password"]):
-            # Update last login time
-            collection.update_one(
-                {"username": username.lower()},
-                {"$set": {"last_login": datetime.now(timezone.utc)}}
+        user = collection.find_one({"username": username.lower()}, USER_EXCLUDED_FIELDS)
+
+        # Always run a bcrypt check so response time does not reveal whether the user exists
+        stored_hash = user["password"] if user is not None else get_dummy_password_hash()
+        password_matches = verify_password(password, stored_hash)
+
+        if user is not None and password_matches:
+            # Record last login without waiting for the acknowledgement
+            collection.with_options(write_concern=WriteConcern(w=0)).update_one(
+                {"_id": user["_id"]},
+                {"$currentDate": {"last_login": {"$type": "date"}}}
             )
             return True, user
         return False, None
@@ -222,6 +446,21 @@ def validate_login(username: str, password: str) -> Tuple[bool, Optional[Mapping
         return False, None
 
 
+@lru_cache(maxsize=8)
+def week_start_for(date_key: date) -> datetime:
+    """
+    Get the start (Monday) of the week containing a given UTC date.
+
+    Args:
+        date_key: UTC calendar date
+
+    Returns:
+        Monday 00:00:00 UTC of that week
+    """
+    monday = date_key - timedelta(days=date_key.weekday())
+    return datetime(monday.year, monday.month, monday.day, tzinfo=timezone.utc)
+
+
 def get_week_start_date() -> datetime:
     """
     Get the start date (Monday) of the current week.
@@ -229,37 +468,109 @@ def get_week_start_date() -> datetime:
     Returns:
         Monday 00:00:00 UTC of the current week
     """
-    now = datetime.now(timezone.utc)
-    # Get previous Monday (week start)
-    days_since_monday = now.weekday()
-    monday = now - timedelta(days=days_since_monday)
-    return monday.replace(hour=0, minute=0, second=0, microsecond=0)
+    return week_start_for(datetime.now(timezone.utc).date())
 
 
-def get_workout_logs(user_id: str, days: int = 0) -> List[Dict]:
+@lru_cache(maxsize=4096)
+def object_id_from_str(id_str: str) -> ObjectId:
     """
-    Fetch workout logs for a given user.
+    Parse an ObjectId string, reusing the result for repeated strings.
+
+    Args:
+        id_str: 24-character hex ObjectId string
+
+    Returns:
+        Parsed ObjectId
+    """
+    return ObjectId(id_str)
+
+
+def as_object_id(user_id: Union[str, ObjectId]) -> ObjectId:
+    """
+    Coerce a user ID string to an ObjectId, passing ObjectIds through.
+
+    Args:
+        user_id: User ID string or ObjectId
+
+    Returns:
+        User ObjectId
+
+    Raises:
+        InvalidId: If a string is not a valid ObjectId
+        TypeError: If user_id is neither a string nor an ObjectId (e.g. None)
+    """
+    if isinstance(user_id, ObjectId):
+        return user_id
+    if isinstance(user_id, str):
+        return object_id_from_str(user_id)
+    raise TypeError(f"user_id must be a str or ObjectId, not {type(user_id).__name__}")
+
+
+def iter_workout_logs(
+        user_id: str,
+        days: int = 0,
+        limit: Optional[int] = None,
+        batch_size: int = WORKOUT_LOG_BATCH_SIZE,
+        projection: Optional[Dict[str, int]] = WORKOUT_LOG_SUMMARY_FIELDS,
+        before: Optional[Tuple[datetime, ObjectId]] = None
+) -> Iterator[Dict]:
+    """
+    Stream workout logs for a given user, newest first.
 
     Args:
         user_id: User ID string
         days: If > 0, only fetch logs from the last 'days' days. 0 means fetch all logs.
+        limit: Optional maximum number of logs to return
+        batch_size: Number of logs fetched per network round trip
+        projection: Fields to return (None returns full documents)
+        before: Optional (date, _id) of the last log seen, to return only the logs after it
 
     Returns:
-        List of workout log documents
+        Iterator over workout log documents
     """
+    # Reject malformed IDs before touching the connection pool
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return iter(())
+
     collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_LOGS"])
     if collection is None:
-        return []
+        return iter(())
 
-    query = {"user_id": ObjectId(user_id)}
+    query = {"user_id": user_obj_id}
 
     if days > 0:
         now_utc = datetime.now(timezone.utc)
         cutoff = now_utc - timedelta(days=days)
         query["date"] = {"$gte": cutoff}
 
-    logs = list(collection.find(query).sort("date", -1))
-    return logs
+    if before is not None:
+        # Logs share a date per day, so _id breaks ties and the cursor resumes mid-day
+        before_date, before_id = before
+        query["$or"] = [
+            {"date": {"$lt": before_date}},
+            {"date": before_date, "_id": {"$lt": before_id}}
+        ]
+
+    cursor = collection.find(query, projection).sort([("date", -1), ("_id", -1)]).batch_size(batch_size)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+def get_workout_logs(user_id: str, days: int = 0) -> List[Dict]:
+    """
+    Fetch workout logs for a given user.
+
+    Args:
+        user_id: User ID string
+        days: If > 0, only fetch logs from the last 'days' days. 0 means fetch all logs.
+
+    Returns:
+        List of workout log documents
+    """
+    return list(iter_workout_logs(user_id, days, projection=None))
 
 
 def get_weekly_workout_stats(user_id: str) -> Optional[Dict[str, int]]:
@@ -272,6 +583,17 @@ def get_weekly_workout_stats(user_id: str) -> Optional[Dict[str, int]]:
     Returns:
         Dictionary with workouts count, total minutes, and calories, or None if no workouts
     """
+    # Reject malformed IDs before touching the connection pool
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return None
+
+    with user_stats_cache_lock:
+        stats = weekly_stats_cache.get(user_obj_id, CACHE_MISS)
+    if stats is not CACHE_MISS:
+        return stats
+
     collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_LOGS"])
     if collection is None:
         return None
@@ -279,30 +601,26 @@ def get_weekly_workout_stats(user_id: str) -> Optional[Dict[str, int]]:
     now_utc = datetime.now(timezone.utc)
     start_date = now_utc - timedelta(days=7)
 
-    # Find logs for the past 7 days
-    query = {
-        "user_id": ObjectId(user_id),
-        "date": {"$gte": start_date}
-    }
-
-    logs_cursor = collection.find(query)
-    workouts_count = 0
-    total_minutes = 0
-    total_calories = 0
-
-    for log in logs_cursor:
-        workouts_count += 1
-        total_minutes += log.get("total_duration_minutes", 0)
-        total_calories += log.get("total_calories_burned", 0)
-
-    if workouts_count == 0:
-        return None
-
-    return {
-        "workouts": workouts_count,
-        "minutes": total_minutes,
-        "calories": total_calories
-    }
+    # Sum the past 7 days of logs on the server
+    pipeline = [
+        {"$match": {
+            "user_id": user_obj_id,
+            "date": {"$gte": start_date}
+        }},
+        {"$group": {
+            "_id": None,
+            "workouts": {"$sum": 1},
+            "minutes": {"$sum": "$total_duration_minutes"},
+            "calories": {"$sum": "$total_calories_burned"}
+        }},
+        {"$project": {"_id": 0}}
+    ]
+
+    # No group document is produced when there are no workouts
+    stats = next(collection.aggregate(pipeline), None)
+    with user_stats_cache_lock:
+        weekly_stats_cache[user_obj_id] = stats
+    return stats
 
 
 def get_latest_wellbeing_score(user_id: str) -> Optional[int]:
@@ -315,18 +633,47 @@ def get_latest_wellbeing_score(user_id: str) -> Optional[int]:
     Returns:
         Well-being score or None if not found
     """
+    # Reject malformed IDs before touching the connection pool
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return None
+    with user_stats_cache_lock:
+        score = wellbeing_score_cache.get(user_obj_id, CACHE_MISS)
+    if score is not CACHE_MISS:
+        return score
+
     collection = get_collection(DB_NAME, COLLECTIONS["WELLBEING_SCORES"])
     if collection is None:
         return None
 
     doc = collection.find_one(
-        {"user_id": ObjectId(user_id)},
+        {"user_id": user_obj_id},
+        {"score": 1, "_id": 0},
         sort=[("date", -1)]
     )
 
-    if doc:
-        return doc.get("score", None)
-    return None
+    score = doc.get("score", None) if doc else None
+    with user_stats_cache_lock:
+        wellbeing_score_cache[user_obj_id] = score
+    return score
+
+
+def invalidate_user_stats(user_id: Union[str, ObjectId]) -> None:
+    """
+    Drop a user's cached weekly stats and well-being score after new data is logged.
+
+    Args:
+        user_id: User ID string or ObjectId
+    """
+    # Nothing can be cached under a malformed ID
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return
+    with user_stats_cache_lock:
+        weekly_stats_cache.pop(user_obj_id, None)
+        wellbeing_score_cache.pop(user_obj_id, None)
 
 
 def save_user_plan(user_id: str, plan_data: Dict) -> Tuple[bool, str]:
@@ -345,27 +692,58 @@ def save_user_plan(user_id: str, plan_data: Dict) -> Tuple[bool, str]:
         return False, "Database connection failed"
 
     try:
-        # Deactivate old plans
-        collection.update_many(
-            {"user_id": user_id, "is_active": True},
-            {"$set": {"is_active": False}}
-        )
+        # Store the same ObjectId type as other plans so the active-plan user_id index applies
+        user_obj_id = as_object_id(user_id)
 
         plan_document = {
-            "user_id": user_id,
+            "_id": ObjectId(),
+            "user_id": user_obj_id,
             "plan_data": plan_data,
             "created_at": datetime.now(timezone.utc),
             "is_active": True,
-            "completion_status": {day: False for day in plan_data['schedule'].keys()}
+            "completion_status": dict.fromkeys(plan_data['schedule'], False)
         }
 
-        result = collection.insert_one(plan_document)
-        return True, str(result.inserted_id)
+        # Deactivate old plans and insert the new one in a single round trip
+        collection.bulk_write([
+            UpdateMany({"user_id": user_obj_id, "is_active": True}, {"$set": {"is_active": False}}),
+            InsertOne(plan_document)
+        ], ordered=True)
+        return True, str(plan_document["_id"])
 
     except Exception as e:
         return False, str(e)
 
 
+def migrate_plan_user_ids() -> int:
+    """
+    Convert workout plans stored with a string user_id to ObjectId.
+
+    One-off admin migration, not run by the app. Run it once from the project root:
+        python -c "from utils.mongo_helper import migrate_plan_user_ids; migrate_plan_user_ids()"
+    It is idempotent, so if it times out part way, run it again to convert the rest.
+
+    Returns:
+        Number of plans converted
+    """
+    collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_PLANS"])
+    if collection is None:
+        return 0
+
+    try:
+        # Only valid 24-hex strings are converted, so $toObjectId cannot fail part way
+        result = collection.update_many(
+            {"user_id": {"$regex": "^[0-9a-fA-F]{24}$"}},
+            [{"$set": {"user_id": {"$toObjectId": "$user_id"}}}]
+        )
+        if result.modified_count:
+            print(f"✅ Converted user_id to ObjectId on {result.modified_count} workout plans")
+        return result.modified_count
+    except Exception as e:
+        print(f"❌ Error migrating workout plan user ids: {e}")
+        return 0
+
+
 def save_workout_plan(user_id: str, plan_data: Dict) -> Tuple[bool, str]:
     """
     Save a workout plan to the database and mark it as active.
@@ -383,10 +761,11 @@ def save_workout_plan(user_id: str, plan_data: Dict) -> Tuple[bool, str]:
             return False, "Could not connect to database"
 
         # Convert string user_id to ObjectId if necessary
-        user_obj_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_obj_id = as_object_id(user_id)
 
         # Format the plan for MongoDB
         plan_document = {
+            "_id": ObjectId(),
             "user_id": user_obj_id,
             "created_at": datetime.now(timezone.utc),
             "schedule": plan_data["schedule"],
@@ -394,15 +773,12 @@ def save_workout_plan(user_id: str, plan_data: Dict) -> Tuple[bool, str]:
             "metadata": plan_data["metadata"]
         }
 
-        # Deactivate all existing workout plans for this user
-        collection.update_many(
-            {"user_id": user_obj_id},
-            {"$set": {"is_active": False}}
-        )
-
-        # Insert the new workout plan
-        result = collection.insert_one(plan_document)
-        return True, str(result.inserted_id)
+        # Deactivate existing plans and insert the new one in a single round trip
+        collection.bulk_write([
+            UpdateMany({"user_id": user_obj_id, "is_active": True}, {"$set": {"is_active": False}}),
+            InsertOne(plan_document)
+        ], ordered=True)
+        return True, str(plan_document["_id"])
 
     except Exception as e:
         return False, str(e)
@@ -420,7 +796,7 @@ def get_active_workout_plan(user_id: str) -> Optional[Dict]:
     """
     try:
         # Convert user_id to ObjectId if it's a string
-        user_obj_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_obj_id = as_object_id(user_id)
 
         # Get the user's active workout plan collection
         plans_collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_PLANS"])
@@ -438,11 +814,24 @@ def get_active_workout_plan(user_id: str) -> Optional[Dict]:
 
     except Exception as e:
         print(f"❌ Error retrieving active workout plan: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
 
+@lru_cache(maxsize=64)
+def met_value_for(activity_type: str) -> float:
+    """
+    Get the MET value for an activity type, normalizing its case once per distinct type.
+
+    Args:
+        activity_type: Type of activity (e.g., "warm_up", "exercise")
+
+    Returns:
+        MET value, or the default for unknown activity types
+    """
+    return MET_VALUES.get(activity_type.lower(), MET_VALUES["unknown"])
+
+
 def estimate_calories_burned(activity_type: str, duration_minutes: int, weight_kg: float) -> int:
     """
     Estimate calories burned based on activity type, duration, and user weight.
@@ -456,7 +845,7 @@ def estimate_calories_burned(activity_type: str, duration_minutes: int, weight_k
         Estimated calories burned (rounded to nearest integer)
     """
     # Get MET value for the activity type
-    met = MET_VALUES.get(activity_type.lower(), MET_VALUES["unknown"])
+    met = met_value_for(activity_type)
 
     # Calculate calories: MET * weight (kg) * duration (hours)
     # 1 MET = 1 kcal/kg/hour
@@ -466,13 +855,110 @@ def estimate_calories_burned(activity_type: str, duration_minutes: int, weight_k
     return round(calories)
 
 
+def get_user_weight(user_obj_id: ObjectId) -> float:
+    """
+    Get a user's weight for calorie estimation, cached for a few minutes.
+
+    Args:
+        user_obj_id: User ObjectId
+
+    Returns:
+        Weight in kilograms, or the default weight if unknown
+    """
+    with user_weight_cache_lock:
+        weight = user_weight_cache.get(user_obj_id)
+    if weight is not None:
+        return weight
+
+    user_collection = get_collection(DB_NAME, COLLECTIONS["USERS"])
+    if user_collection is None:
+        return DEFAULT_WEIGHT_KG
+
+    user = user_collection.find_one({"_id": user_obj_id}, {"weight": 1, "_id": 0})
+    weight = user.get('weight') if user else None
+    if weight is None:
+        return DEFAULT_WEIGHT_KG
+
+    with user_weight_cache_lock:
+        user_weight_cache[user_obj_id] = weight
+    return weight
+
+
+def estimate_total_calories(activities: List[Tuple[str, int]], weight_kg: float) -> int:
+    """
+    Estimate calories burned over several activities in a single pass.
+
+    Args:
+        activities: List of (activity_type, duration_minutes) pairs
+        weight_kg: User's weight in kilograms
+
+    Returns:
+        Estimated total calories burned (rounded to nearest integer)
+    """
+    # Sum MET-minutes first so the weight scaling and rounding happen once
+    met_minutes = sum(
+        met_value_for(activity_type) * duration
+        for activity_type, duration in activities
+    )
+    return round(met_minutes * weight_kg / 60)
+
+
+def save_workout_logs_bulk(log_documents: List[Dict]) -> Tuple[bool, Union[List[str], str]]:
+    """
+    Save several workout log documents with unordered bulk inserts.
+
+    Args:
+        log_documents: Workout log documents to insert
+
+    Returns:
+        Tuple of (success_status, list of log_ids or error message)
+    """
+    collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_LOGS"])
+    if collection is None:
+        return False, "Could not connect to database"
+
+    try:
+        # Assign ids up front so they are known without reading the insert result
+        for document in log_documents:
+            document.setdefault("_id", ObjectId())
+
+        log_collection = collection.with_options(write_concern=ACTIVITY_WRITE_CONCERN)
+        for start in range(0, len(log_documents), WORKOUT_LOG_INSERT_CHUNK_SIZE):
+            log_collection.insert_many(
+                log_documents[start:start + WORKOUT_LOG_INSERT_CHUNK_SIZE],
+                ordered=False
+            )
+
+        for user_obj_id in {document["user_id"] for document in log_documents}:
+            invalidate_user_stats(user_obj_id)
+        return True, [str(document["_id"]) for document in log_documents]
+
+    except Exception as e:
+        return False, str(e)
+
+
+def save_single_workout_log(log_document: Dict) -> Tuple[bool, str]:
+    """
+    Save one workout log document through the bulk insert path.
+
+    Args:
+        log_document: Workout log document to insert
+
+    Returns:
+        Tuple of (success_status, message or log_id)
+    """
+    success, result = save_workout_logs_bulk([log_document])
+    return success, result[0] if success else result
+
+
 def save_workout_log(
         user_id: str,
         workout_date: str,
         workout_activities: List[Dict],
         workout_type: str,
         notes: str = "",
-        plan_id: Optional[str] = None
+        plan_id: Optional[str] = None,
+        user_weight: Optional[float] = None
 ) -> Tuple[bool, str]:
     """
     Save a completed workout to the workout_logs collection.
@@ -484,25 +970,24 @@ def save_workout_log(
         workout_type: Type of workout (e.g., "Strength", "Cardio")
         notes: Optional notes about the workout
         plan_id: Optional ID of the workout plan this log belongs to
+        user_weight: Optional known weight in kg, saving the user lookup
 
     Returns:
         Tuple of (success_status, message or log_id)
     """
     try:
-        collection = get_collection(DB_NAME, COLLECTIONS["WORKOUT_LOGS"])
-        if collection is None:
-            return False, "Could not connect to database"
-
         # Convert string user_id to ObjectId if necessary
-        user_obj_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        user_obj_id = as_object_id(user_id)
 
         # Convert plan_id to ObjectId if provided
         plan_obj_id = ObjectId(plan_id) if plan_id else None
 
+        # Parse the YYYY-MM-DD date once for either log format
+        workout_date_obj = datetime.fromisoformat(workout_date).replace(tzinfo=timezone.utc)
+
         # Handle both old format (empty workout_refs) and new format (schedule)
         if not workout_activities or (isinstance(workout_activities, list) and len(workout_activities) == 0):
             # Simple log with minimal information for old format
-            workout_date_obj = datetime.strptime(workout_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
             log_document = {
                 "user_id": user_obj_id,
                 "date": workout_date_obj,
@@ -516,43 +1001,39 @@ def save_workout_log(
             if plan_obj_id:
                 log_document["plan_id"] = plan_obj_id
 
-            result = collection.insert_one(log_document)
-            return True, str(result.inserted_id)
+            return save_single_workout_log(log_document)
 
         # Calculate total duration and estimated calories for the new format
         total_duration = sum(block.get('duration', 0) for block in workout_activities)
 
-        # Get user weight for calorie estimation
-        user_collection = get_collection(DB_NAME, COLLECTIONS["USERS"])
-        user = user_collection.find_one({"_id": user_obj_id})
-        user_weight = user.get('weight', 70) if user else 70  # Default to 70kg if not found
-
-        # Calculate estimated calories
-        total_calories = 0
-        activities_log = []
-
-        for block in workout_activities:
-            activity = block.get('activity', {})
-            if not activity:
-                continue
+        # Get user weight for calorie estimation unless the caller already has it
+        if user_weight is None:
+            user_weight = get_user_weight(user_obj_id)
 
-            activity_type = activity.get('type', 'unknown')
-            activity_id = str(activity.get('_id', ''))
-            duration = block.get('duration', 0)
+        # Resolve each block's activity, type and duration once for both the log and the estimate
+        activity_blocks = [
+            (activity, activity.get('type', 'unknown'), block.get('duration', 0))
+            for block in workout_activities
+            if (activity := block.get('activity'))
+        ]
 
-            # Add to activities log
-            activities_log.append({
+        activities_log = [
+            {
                 "collection_name": activity_type,
-                "exercise_id": activity_id,
+                "exercise_id": str(activity.get('_id', '')),
                 "duration_minutes": duration,
                 "notes": ""
-            })
+            }
+            for activity, activity_type, duration in activity_blocks
+        ]
 
-            # Add to calorie count
-            total_calories += estimate_calories_burned(activity_type, duration, user_weight)
+        # Calculate estimated calories
+        total_calories = estimate_total_calories(
+            [(activity_type, duration) for _, activity_type, duration in activity_blocks],
+            user_weight
+        )
 
         # Create workout log document
-        workout_date_obj = datetime.strptime(workout_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
         log_document = {
             "user_id": user_obj_id,
             "date": workout_date_obj,
@@ -567,8 +1048,7 @@ def save_workout_log(
             log_document["plan_id"] = plan_obj_id
 
         # Insert the workout log
-        result = collection.insert_one(log_document)
-        return True, str(result.inserted_id)
+        return save_single_workout_log(log_document)
 
     except Exception as e:
         return False, str(e)
@@ -585,68 +1065,105 @@ def mark_workout_as_completed(user_id: Union[str, ObjectId], day_of_week: str) -
     Returns:
         Tuple of (success_status, message)
     """
+    # Reject malformed IDs before touching the connection pool
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return False, "Invalid user id"
+
     collection = get_collection(DB_NAME, COLLECTIONS["COMPLETED_WORKOUTS"])
     if collection is None:
         return False, "Database connection failed"
 
-    user_obj_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
     day = day_of_week.lower()
-
-    # Record the completion
-    completion_doc = {
-        "user_id": user_obj_id,
-        "day_of_week": day,
-        "completed_at": datetime.now(timezone.utc),
-        "week_start_date": get_week_start_date()
-    }
+    week_start_date = get_week_start_date()
 
     try:
-        # First check if already completed this week
-        existing = collection.find_one({
-            "user_id": user_obj_id,
-            "day_of_week": day,
-            "week_start_date": get_week_start_date()
-        })
+        # Record the completion unless this week's entry already exists
+        result = collection.with_options(write_concern=ACTIVITY_WRITE_CONCERN).update_one(
+            {
+                "user_id": user_obj_id,
+                "day_of_week": day,
+                "week_start_date": week_start_date
+            },
+            {"$setOnInsert": {"completed_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+        with completed_days_cache_lock:
+            completed_days_cache.pop((user_obj_id, week_start_date), None)
 
-        if existing:
+        if result.upserted_id is None:
             # Already marked as completed
             return True, "Already completed"
 
-        # Insert new completion record
-        result = collection.insert_one(completion_doc)
-        return bool(result.inserted_id), "Workout marked as completed"
+        return True, "Workout marked as completed"
 
     except Exception as e:
         print(f"Error marking workout as completed: {e}")
         return False, str(e)
 
 
-def is_workout_completed(user_id: Union[str, ObjectId], day_of_week: str) -> bool:
+def is_workout_completed(
+        user_id: Union[str, ObjectId],
+        day_of_week: str,
+        week_start_date: Optional[datetime] = None
+) -> bool:
     """
     Check if a workout is completed for the current week.
 
     Args:
         user_id: User ID string or ObjectId
         day_of_week: Day of the week (e.g., "monday", "tuesday")
+        week_start_date: Optional precomputed start of the current week
 
     Returns:
         True if workout is completed, False otherwise
     """
-    collection = get_collection(DB_NAME, COLLECTIONS["COMPLETED_WORKOUTS"])
-    if collection is None:
-        return False
+    # Answered from the week's cached completions rather than a query per day
+    return day_of_week.lower() in get_completed_workout_days(user_id, week_start_date)
 
-    user_obj_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
-    day = day_of_week.lower()
 
-    # Check if workout is completed for the current week
-    existing = collection.find_one({
-        "user_id": user_obj_id,
-        "day_of_week": day,
-        "week_start_date": get_week_start_date()
-    })
+def get_completed_workout_days(
+        user_id: Union[str, ObjectId],
+        week_start_date: Optional[datetime] = None
+) -> FrozenSet[str]:
+    """
+    Get the days with a completed workout in the current week, cached for a minute.
+
+    Args:
+        user_id: User ID string or ObjectId
+        week_start_date: Optional precomputed start of the current week
+
+    Returns:
+        Set of completed days (e.g., {"monday", "wednesday"})
+    """
+    # Reject malformed IDs before touching the connection pool
+    try:
+        user_obj_id = as_object_id(user_id)
+    except (InvalidId, TypeError):
+        return frozenset()
 
-    return existing is not None
+    if week_start_date is None:
+        week_start_date = get_week_start_date()
+
+    cache_key = (user_obj_id, week_start_date)
+    with completed_days_cache_lock:
+        completed_days = completed_days_cache.get(cache_key)
+    if completed_days is not None:
+        return completed_days
+
+    collection = get_collection(DB_NAME, COLLECTIONS["COMPLETED_WORKOUTS"])
+    if collection is None:
+        return frozenset()
+
+    completed_days = frozenset(collection.distinct(
+        "day_of_week",
+        {"user_id": user_obj_id, "week_start_date": week_start_date}
+    ))
+    with completed_days_cache_lock:
+        completed_days_cache[cache_key] = completed_days
+    return completed_days
 
 
 def get_workout_for_day(workout_plan: Optional[Dict], day_of_week: str) -> Optional[Dict]:
@@ -680,8 +1197,11 @@ def get_next_incomplete_workout_day(user_id: str, workout_plan: Optional[Dict])
     if workout_plan is None:
         return None
 
-    today = datetime.now().strftime("%A").lower()
-    today_index = DAYS_OF_WEEK.index(today)
+    # DAYS_OF_WEEK starts on Monday, matching weekday()
+    today_index = datetime.now().weekday()
+
+    # Fetch the week's completed days in one query rather than one per day
+    completed_days = get_completed_workout_days(user_id)
 
     for i in range(1, 8):
         next_index = (today_index + i) % 7
@@ -690,7 +1210,7 @@ def get_next_incomplete_workout_day(user_id: str, workout_plan: Optional[Dict])
         if next_day not in workout_plan['schedule']:
             continue
 
-        if is_workout_completed(user_id, next_day):
+        if next_day in completed_days:
             continue
 
         return next_day
@@ -706,6 +1226,25 @@ def initialize_fitness_collections() -> bool:
         True if initialization was successful or collections already had data, 
         False if there was an error
     """
+    global fitness_collections_initialized
+
+    if fitness_collections_initialized:
+        return True
+
+    with fitness_collections_lock:
+        if not fitness_collections_initialized:
+            fitness_collections_initialized = seed_fitness_collections()
+        return fitness_collections_initialized
+
+
+def seed_fitness_collections() -> bool:
+    """
+    Load the bundled sample data into any empty fitness collections.
+
+    Returns:
+        True if every collection was seeded, already had data or has no seed file,
+        False if any failed to load
+    """
     client = init_connection()
     if client is None:
         return False
@@ -722,19 +1261,38 @@ def initialize_fitness_collections() -> bool:
             COLLECTIONS["COOL_DOWNS"]: 'cool_downs.json'
         }
 
+        all_loaded = True
+
         for coll_name, filename in collections_data.items():
-            if db[coll_name].count_documents({}) == 0:
+            # Metadata-based count avoids scanning the collection
+            if db[coll_name].estimated_document_count() == 0:
                 try:
-                    with open(f'data/{filename}', 'r') as f:
-                        data = json.load(f)
-                        db[coll_name].insert_many(data)
+                    with open(f'data/{filename}', 'rb') as f:
+                        data = json_loads(f.read())
+                        # Seeds are idempotent, so skip waiting for majority replication
+                        seed_collection = db.get_collection(coll_name, write_concern=SEED_WRITE_CONCERN)
+                        seed_collection.insert_many(data, ordered=False)
                         print(f"✅ Initialized {coll_name} collection")
+                except BulkWriteError as e:
+                    # Duplicate keys only mean another process seeded the same empty
+                    # collection concurrently; any other write error is a real failure
+                    inserted = e.details.get("nInserted", 0)
+                    write_errors = e.details.get("writeErrors", [])
+                    if all(error.get("code") == 11000 for error in write_errors):
+                        print(f"✅ Initialized {coll_name} collection ({inserted} new documents)")
+                    else:
+                        print(f"❌ Error loading {filename}: {len(write_errors)} documents rejected")
+                        all_loaded = False
                 except FileNotFoundError:
-                    print(f"❌ File not found: data/{filename}")
+                    # A missing seed file is a deployment choice, not a transient
+                    # failure, so retrying on every call would only repeat this message
+                    print(f"❌ File not found: data/{filename}, leaving {coll_name} empty")
                 except Exception as e:
                     print(f"❌ Error loading {filename}: {str(e)}")
+                    all_loaded = False
 
-        return True
+        # Report failure so initialize_fitness_collections retries on its next call
+        return all_loaded
 
     except Exception as e:
         print(f"Error initializing collections: {str(e)}")